@@ -4,18 +4,801 @@ Excel Skill — Direct programmatic access to Excel files.
 Layer 1 (Skill/API) — No UI automation needed.
 
 Usage:
-  python3 excel-skill.py read <filepath> [--sheet <name>] [--range <A1:B10>]
+  python3 excel-skill.py read <filepath> [--sheet <name>] [--range <A1:B10>] [--ndjson]
   python3 excel-skill.py read-cell <filepath> <cell> [--sheet <name>]
   python3 excel-skill.py write-cell <filepath> <cell> <value> [--sheet <name>]
-  python3 excel-skill.py search <filepath> <query> [--sheet <name>]
+  python3 excel-skill.py search <filepath> <query> [--sheet <name>] [--max-matches <n>] [--ndjson]
   python3 excel-skill.py list-sheets <filepath>
   python3 excel-skill.py info <filepath>
+  python3 excel-skill.py daemon [--socket <path>] [--max-workbooks <n>]
 
-All output is JSON for easy parsing by the agent.
+All output is JSON for easy parsing by the agent. read returns the header row once
+and each data row as an array in header order ({"headers": [...], "rows": [[...], ...]}),
+with cell values as JSON numbers, booleans and null where the cell holds one; dates
+are strings. With --ndjson, read and search stream one JSON value per line instead:
+a header record, one record per row (an array) or match, then a summary record
+(rowCount/totalRows or matchCount).
+
+Full-sheet reads (search, read --max-rows 0, info) use python-calamine when it is
+installed (a Rust parser, faster than building openpyxl cell objects, though it
+loads a whole sheet into memory). Bounded reads (read with --max-rows or a --range,
+read-cell) and machines without calamine use openpyxl's read-only mode, which
+stops at the last row needed.
+write-cell patches the sheet XML in place and only falls back to an openpyxl
+load/save for cells it cannot patch safely (e.g. formulas).
+
+When a daemon is running, the read commands are forwarded to it and the workbook
+stays loaded between calls (search also keeps a lowercased copy of each searched
+sheet). Without one, or when it does not answer in time, the file is parsed
+directly as before; write-cell always runs directly.
+
+info, list-sheets and read outputs are cached on disk (~/.cache/wf-agent/excel,
+or $WF_EXCEL_SKILL_CACHE; set it to '' to disable) and reused while the file is
+unchanged.
 """
-import sys, json, argparse, os
+import sys, json, argparse, io, os, re, hashlib, importlib.util, posixpath, queue, shutil, tempfile, threading, zipfile
+from datetime import date, datetime
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape as xml_escape
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import islice
 
-def main():
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Unix socket of the optional daemon (see _serve)
+_SOCKET_ENV = 'WF_EXCEL_SKILL_SOCKET'
+_DEFAULT_SOCKET = '~/.cache/wf-agent/excel-skill.sock'
+# Seconds a client waits for the daemon's answer before parsing the file itself
+_DAEMON_TIMEOUT = 10
+
+# On-disk cache of info / list-sheets / read output; set the variable to '' to disable it
+_CACHE_ENV = 'WF_EXCEL_SKILL_CACHE'
+_DEFAULT_CACHE = '~/.cache/wf-agent/excel'
+_CACHE_MAX_ENTRIES = 256
+_CACHE_MAX_TOTAL_BYTES = 64 * 1024 * 1024  # for the whole directory
+_CACHE_MAX_ENTRY_BYTES = 1024 * 1024  # larger outputs (e.g. read --max-rows 0 dumps) are not kept
+_CACHE_VERSION = 2  # bump when the output of a cached command changes
+
+# Rows parsed ahead of the encoder by read --ndjson (see _RowPrefetcher)
+_PREFETCH_ROWS = 64
+
+# Formats openpyxl can open; calamine also reads .xls, .xlsb and .ods
+_OPENPYXL_SUFFIXES = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+
+# info only fans out to worker processes for workbooks at least this large
+_PARALLEL_INFO_MIN_BYTES = 4 * 1024 * 1024
+
+# SpreadsheetML / OPC namespaces, in ElementTree's '{ns}tag' form
+_SSML = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_DOC_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_RANGE_RE = re.compile(r'^\$?([A-Za-z]*)\$?(\d*)$')
+
+# Raw-XML patterns used by write-cell
+_R_ATTR_RE = re.compile(rb'\sr\s*=\s*["\']([A-Za-z]*\d+)["\']')
+_T_ATTR_RE = re.compile(rb'\st\s*=\s*("[^"]*"|\'[^\']*\')')
+_SPANS_ATTR_RE = re.compile(rb'\sspans\s*=\s*("[^"]*"|\'[^\']*\')')
+_XML_ILLEGAL_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Numeric write-cell values (ASCII digits only; surrounding whitespace is allowed, as float() does)
+_INT_VALUE_RE = re.compile(r'\s*[+-]?\d+\s*', re.ASCII)
+_FLOAT_VALUE_RE = re.compile(r'\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\s*', re.ASCII)
+
+def _dumps(obj):
+    """Serialize a result to a JSON string (with orjson when it is installed).
+    Cell values JSON has no type for (dates, times, durations) are written as str(value).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME).decode('utf-8')
+        except TypeError:
+            pass  # e.g. an integer beyond 64 bits; the stdlib encoder handles it
+    return json.dumps(obj, default=str)
+
+def _write_ndjson(records):
+    """Write records to stdout, one JSON object per line."""
+    if orjson is not None:
+        write, dumps = sys.stdout.buffer.write, orjson.dumps
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_APPEND_NEWLINE
+        for record in records:
+            try:
+                write(dumps(record, default=str, option=option))
+            except TypeError:
+                write((json.dumps(record, default=str) + "\n").encode('utf-8'))
+    else:
+        write = sys.stdout.write
+        for record in records:
+            write(json.dumps(record, default=str) + "\n")
+
+def _parse_cell_value(text):
+    """Typed value for write-cell: an int, a float, or the text itself.
+    Floats with no fractional part are stored as ints ('3.0' -> 3).
+    """
+    if _INT_VALUE_RE.fullmatch(text):
+        return int(text)
+    if _FLOAT_VALUE_RE.fullmatch(text):
+        val = float(text)
+        if val.is_integer():
+            return int(val)
+        if val == val and abs(val) != float('inf'):
+            return val
+    return text
+
+def _col_index(letters):
+    """Convert column letters ('A', 'AB') to a 1-based column index."""
+    idx = 0
+    for ch in letters.upper():
+        idx = idx * 26 + ord(ch) - 64
+    return idx
+
+def _range_bounds(ref):
+    """Parse 'A1:B10' (or 'A:B', '2:5', 'B3') into (min_col, min_row, max_col, max_row).
+    Open ends are returned as None.
+    """
+    parts = ref.split(':')
+    if len(parts) > 2:
+        raise ValueError(f"Invalid range: {ref}")
+    bounds = []
+    for part in parts:
+        m = _RANGE_RE.match(part.strip())
+        if not m or not (m.group(1) or m.group(2)):
+            raise ValueError(f"Invalid range: {ref}")
+        bounds.append((_col_index(m.group(1)) if m.group(1) else None,
+                       int(m.group(2)) if m.group(2) else None))
+    (min_col, min_row), (max_col, max_row) = bounds[0], bounds[-1]
+    return min_col, min_row, max_col, max_row
+
+def _calamine_value(v):
+    """Normalize a calamine cell value to what openpyxl would return."""
+    if v == "":
+        return None
+    if type(v) is float and v.is_integer():
+        return int(v)
+    if type(v) is date:
+        return datetime(v.year, v.month, v.day)
+    return v
+
+class _CalamineReader:
+    """Read-only workbook backed by python-calamine.
+    Faster than openpyxl, but each sheet's whole cell range is loaded into memory
+    on first use; iter_rows() only slices rows out of it.
+    """
+
+    def __init__(self, filepath):
+        self._filepath = filepath
+        self._wb = CalamineWorkbook.from_path(filepath)
+        self.sheetnames = self._wb.sheet_names
+        self._sheets = {}
+        self._active = self._active_sheet(filepath)
+
+    def _active_sheet(self, filepath):
+        # calamine has no notion of the active sheet; take it from workbook.xml
+        # like openpyxl and write-cell do, or use the first sheet for other formats.
+        if zipfile.is_zipfile(filepath):
+            try:
+                with zipfile.ZipFile(filepath) as zf:
+                    sheets, active, _ = _workbook_sheets(zf)
+            except (KeyError, ElementTree.ParseError):
+                sheets = []
+            if sheets:
+                name = sheets[active if active < len(sheets) else 0][0]
+                if name in self.sheetnames:
+                    return name
+        return self.sheetnames[0]
+
+    def _sheet(self, name):
+        """(calamine sheet, error cells) for a sheet name, or the active sheet."""
+        name = name or self._active
+        if name not in self.sheetnames:
+            raise KeyError(f"Worksheet {name} does not exist.")  # openpyxl's message
+        # Each get_sheet_by_name() call parses the sheet again, so keep the result
+        if name not in self._sheets:
+            self._sheets[name] = (self._wb.get_sheet_by_name(name), self._error_cells(name))
+        return self._sheets[name]
+
+    def _error_cells(self, name):
+        """{row: {column: '#N/A', ...}, ...} for the error cells of an .xlsx sheet.
+
+        calamine returns error cells as empty strings; openpyxl returns their text,
+        so it is read from the sheet XML. The XML is only parsed when it has any.
+        """
+        errors = {}
+        if not zipfile.is_zipfile(self._filepath):
+            return errors
+        try:
+            with zipfile.ZipFile(self._filepath) as zf:
+                part = _worksheet_part(zf, name)
+                if part is None:
+                    return errors
+                data = zf.read(part)
+                if b't="e"' not in data and b"t='e'" not in data:
+                    return errors
+                for _, el in ElementTree.iterparse(io.BytesIO(data)):
+                    if el.tag == _SSML + 'c' and el.get('t') == 'e':
+                        col, row, _, _ = _range_bounds(el.get('r', ''))
+                        value = el.find(_SSML + 'v')
+                        if col and row and value is not None and value.text:
+                            errors.setdefault(row, {})[col] = value.text
+                    elif el.tag == _SSML + 'row':
+                        el.clear()
+        except (KeyError, ValueError, ElementTree.ParseError):
+            pass
+        return errors
+
+    def dimensions(self, name=None):
+        """Return (max_row, max_column) of the used area, counted from A1."""
+        end = self._sheet(name)[0].end
+        # An empty sheet still reports A1 as its extent, like openpyxl.
+        return (end[0] + 1, end[1] + 1) if end else (1, 1)
+
+    def iter_rows(self, name=None, min_row=None, max_row=None, min_col=None, max_col=None):
+        """Yield row tuples of cell values (None for empty cells)."""
+        ws, errors = self._sheet(name)
+        # calamine yields rows from row 1 but trims leading empty columns;
+        # pad them back so column positions match openpyxl.
+        pad = (None,) * ws.start[1] if ws.start else ()
+        start = min_row - 1 if min_row else 0
+        col_slice = slice(min_col - 1 if min_col else 0, max_col)
+        for row_num, row in enumerate(islice(ws.iter_rows(), start, max_row), start + 1):
+            values = pad + tuple(map(_calamine_value, row))
+            if row_num in errors:
+                values = list(values)
+                for col, text in errors[row_num].items():
+                    if col <= len(values):
+                        values[col - 1] = text
+                values = tuple(values)
+            yield values[col_slice]
+
+    def close(self):
+        self._wb.close()
+
+class _OpenpyxlReader:
+    """Read-only workbook backed by openpyxl."""
+
+    def __init__(self, filepath):
+        import openpyxl
+        self._wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+        self.sheetnames = self._wb.sheetnames
+
+    def _sheet(self, name):
+        return self._wb[name] if name else self._wb.active
+
+    def dimensions(self, name=None):
+        ws = self._sheet(name)
+        return ws.max_row, ws.max_column
+
+    def iter_rows(self, name=None, min_row=None, max_row=None, min_col=None, max_col=None):
+        return self._sheet(name).iter_rows(min_row=min_row, max_row=max_row,
+                                           min_col=min_col, max_col=max_col, values_only=True)
+
+    def close(self):
+        self._wb.close()
+
+def _open_reader(filepath, bounded=False):
+    """Open a workbook for reading.
+
+    Full scans use calamine when it is installed, as it is the faster parser.
+    `bounded` reads (a limited number of rows, or one cell) prefer openpyxl's
+    read-only mode for .xlsx files: it stops parsing after the last row needed,
+    where calamine would load the whole sheet first.
+    """
+    if CalamineWorkbook is not None:
+        if not (bounded and os.path.splitext(filepath)[1].lower() in _OPENPYXL_SUFFIXES
+                and importlib.util.find_spec('openpyxl') is not None):
+            return _CalamineReader(filepath)
+    return _OpenpyxlReader(filepath)
+
+class _RowPrefetcher:
+    """Iterate rows that a background thread pulls from `rows`, at most
+    _PREFETCH_ROWS ahead, so parsing overlaps with encoding the previous rows.
+    close() stops the thread; call it before closing the workbook.
+    """
+
+    _DONE = object()
+
+    def __init__(self, rows):
+        self._queue = queue.Queue(maxsize=_PREFETCH_ROWS)
+        self._stop = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._produce, args=(rows,), daemon=True)
+        self._thread.start()
+
+    def _produce(self, rows):
+        try:
+            for row in rows:
+                # Wake up now and then to notice close() while the queue is full
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put(row, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if self._stop.is_set():
+                    return
+        except Exception as e:
+            self._error = e
+        self._queue.put(self._DONE)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._thread is None:
+            raise StopIteration
+        row = self._queue.get()
+        if row is self._DONE:
+            self._thread.join()
+            self._thread = None
+            if self._error is not None:
+                raise self._error
+            raise StopIteration
+        return row
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        # Unblock a producer waiting on a full queue
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._thread.join()
+        self._thread = None
+
+def _col_letters(idx):
+    """Convert a 1-based column index to letters (28 -> 'AB')."""
+    letters = ''
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def _resolve_part(target):
+    """Zip path of a relationship target in xl/_rels/workbook.xml.rels."""
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join('xl', target))
+
+def _workbook_sheets(zf):
+    """Read the sheet list straight from xl/workbook.xml (no cell data is loaded).
+    Returns ([(name, part), ...], active_index, shared_strings_part); part is None
+    when a sheet's relationship cannot be resolved.
+    """
+    root = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+    rels = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    shared_strings = None
+    for rel in rels.iter(_PKG_REL + 'Relationship'):
+        targets[rel.get('Id')] = rel.get('Target')
+        if rel.get('Type', '').endswith('/sharedStrings'):
+            shared_strings = _resolve_part(rel.get('Target'))
+    sheets = []
+    for el in root.iterfind(f'{_SSML}sheets/{_SSML}sheet'):
+        target = targets.get(el.get(_DOC_REL + 'id'))
+        sheets.append((el.get('name'), _resolve_part(target) if target else None))
+    view = root.find(f'{_SSML}bookViews/{_SSML}workbookView')
+    active = int(view.get('activeTab', 0)) if view is not None else 0
+    return sheets, active, shared_strings
+
+def _worksheet_part(zf, sheet):
+    """Zip path of a worksheet's XML, looked up by name (or the active sheet).
+    Returns None when the sheet cannot be resolved.
+    """
+    sheets, active, _ = _workbook_sheets(zf)
+    if sheet:
+        found = [part for name, part in sheets if name == sheet]
+    else:
+        found = [part for _, part in sheets[active:active + 1] or sheets[:1]]
+    return found[0] if found else None
+
+def _sheet_head(zf, part):
+    """Parse a worksheet only up to the end of its first row.
+
+    Returns (dimension_ref, row1_cells, has_rows), where row1_cells is a list of
+    (column, t attribute, raw value) tuples, or None if the sheet has rows or
+    cells without an r attribute.
+    """
+    dimension = None
+    with zf.open(part) as f:
+        for event, el in ElementTree.iterparse(f, events=('start', 'end')):
+            tag = el.tag
+            if event == 'start':
+                if tag == _SSML + 'dimension':
+                    dimension = el.get('ref')
+                elif tag == _SSML + 'row':
+                    r = el.get('r')
+                    if r is None:
+                        return None
+                    if r != '1':
+                        return dimension, [], True
+            elif tag == _SSML + 'row':
+                cells = []
+                for c in el.iterfind(_SSML + 'c'):
+                    ref = c.get('r')
+                    if ref is None:
+                        return None
+                    t = c.get('t', 'n')
+                    if t == 'inlineStr':
+                        value = ''.join(x.text or '' for x in c.iterfind(f'{_SSML}is/{_SSML}t'))
+                        value += ''.join(x.text or '' for x in c.iterfind(f'{_SSML}is/{_SSML}r/{_SSML}t'))
+                    else:
+                        v = c.find(_SSML + 'v')
+                        value = v.text if v is not None else None
+                    cells.append((_range_bounds(ref)[0], t, value))
+                return dimension, cells, True
+            elif tag == _SSML + 'sheetData':
+                break
+    return dimension, [], False
+
+def _shared_strings(zf, part, wanted):
+    """Resolve only the shared-string indices in `wanted`, stopping after the largest one."""
+    strings = {}
+    if not wanted:
+        return strings
+    last = max(wanted)
+    with zf.open(part) as f:
+        index = 0
+        for _, el in ElementTree.iterparse(f):
+            if el.tag != _SSML + 'si':
+                continue
+            if index in wanted:
+                # Rich text runs (<r>) are concatenated; phonetic hints (<rPh>) are skipped
+                strings[index] = ''.join(x.text or '' for x in el.iterfind(_SSML + 't')) + \
+                                 ''.join(x.text or '' for x in el.iterfind(f'{_SSML}r/{_SSML}t'))
+            el.clear()
+            if index == last:
+                break
+            index += 1
+    return strings
+
+def _fast_info(filepath):
+    """Sheet names, sizes and text headers without loading the workbook.
+
+    Sizes come from each sheet's <dimension> record and headers from a parse
+    that stops after row 1; only the shared strings used in the headers are
+    resolved. Returns None when that is not enough (no dimension record,
+    non-text header cells, chart sheets...), so the caller can use a reader.
+    """
+    if not zipfile.is_zipfile(filepath):
+        return None
+    try:
+        with zipfile.ZipFile(filepath) as zf:
+            sheet_list, _, ss_part = _workbook_sheets(zf)
+            heads = []
+            wanted = set()
+            for name, part in sheet_list:
+                head = _sheet_head(zf, part) if part else None
+                if head is None or head[0] is None:
+                    return None
+                for _, t, value in head[1]:
+                    if value is None:
+                        continue
+                    # Numbers, booleans and errors would need openpyxl's type/date handling
+                    if t not in ('s', 'str', 'inlineStr'):
+                        return None
+                    if t == 's':
+                        wanted.add(int(value))
+                heads.append((name, head))
+            strings = _shared_strings(zf, ss_part, wanted) if ss_part else {}
+    except (KeyError, ValueError, ElementTree.ParseError):
+        return None
+
+    sheets = []
+    for name, (dimension, cells, has_rows) in heads:
+        min_col, min_row, max_col, max_row = _range_bounds(dimension)
+        max_col, max_row = max_col or min_col, max_row or min_row
+        headers = [""] * max_col if has_rows else []
+        for col, t, value in cells:
+            if value is not None and col <= len(headers):
+                headers[col - 1] = strings[int(value)] if t == 's' else value
+        sheets.append({"name": name, "rows": max_row, "cols": max_col, "headers": headers})
+    return sheets
+
+def _ref_attr(attrs):
+    """Value of the r="..." attribute in the raw attribute bytes of a start tag."""
+    m = _R_ATTR_RE.search(attrs)
+    return m.group(1).decode('ascii') if m else None
+
+def _cell_xml(prefix, attrs, value):
+    """Serialize a <c> element holding `value`. Strings are written inline, so the
+    shared strings table is left untouched.
+    """
+    attrs = _T_ATTR_RE.sub(b'', attrs).decode('utf-8').rstrip('/').rstrip()
+    if isinstance(value, str):
+        space = ' xml:space="preserve"' if value != value.strip() else ''
+        body = f'<{prefix}is><{prefix}t{space}>{xml_escape(value)}</{prefix}t></{prefix}is>'
+        attrs += ' t="inlineStr"'
+    else:
+        body = f'<{prefix}v>{value!r}</{prefix}v>'
+    return f'<{prefix}c{attrs}>{body}</{prefix}c>'.encode('utf-8')
+
+def _patch_sheet_xml(data, col, row, value):
+    """Set one cell in raw worksheet XML by splicing bytes, without parsing the sheet.
+
+    Rows and cells are located with a regex scan over their start tags; only
+    the target <c> (or a new <row>/<c>) is rewritten. Returns the new XML, or
+    None if the cell cannot be patched safely (formulas, rich values, rows or
+    cells without an r attribute, unexpected layout).
+    """
+    root = re.search(rb'<(\w+:)?worksheet\b', data)
+    if root is None:
+        return None
+    prefix = (root.group(1) or b'').decode('ascii')
+    p = re.escape(prefix.encode('ascii'))
+    ref = f'{_col_letters(col)}{row}'
+    new_cell = _cell_xml(prefix, f' r="{ref}"'.encode('ascii'), value)
+
+    sheet_data = re.search(rb'<' + p + rb'sheetData\b[^>]*>', data)
+    if sheet_data is None:
+        return None
+    if sheet_data.group(0).endswith(b'/>'):
+        # <sheetData/>: open it up around the new row
+        tag = sheet_data.group(0)[:-2].rstrip()
+        splice = (sheet_data.start(), sheet_data.end(),
+                  tag + f'><{prefix}row r="{row}">'.encode('ascii') + new_cell
+                  + f'</{prefix}row></{prefix}sheetData>'.encode('ascii'))
+    else:
+        body_start = sheet_data.end()
+        body_end = data.find(f'</{prefix}sheetData>'.encode('ascii'), body_start)
+        if body_end < 0:
+            return None
+        new_row = f'<{prefix}row r="{row}">'.encode('ascii') + new_cell + f'</{prefix}row>'.encode('ascii')
+        splice = (body_end, body_end, new_row)
+        row_close = f'</{prefix}row>'.encode('ascii')
+        for m in re.compile(rb'<' + p + rb'row\b([^>]*)>').finditer(data, body_start, body_end):
+            r = _ref_attr(m.group(1))
+            if r is None:
+                return None
+            if int(r) < row:
+                continue
+            if int(r) > row:
+                splice = (m.start(), m.start(), new_row)
+                break
+            # Existing row: find the cell, or where it goes
+            attrs = m.group(1)
+            if attrs.endswith(b'/'):
+                content_start = content_end = row_end = m.end()
+            else:
+                content_start = m.end()
+                content_end = data.find(row_close, content_start)
+                if content_end < 0:
+                    return None
+                row_end = content_end + len(row_close)
+            # A new cell can fall outside the row's spans attribute, which is only an
+            # optimization hint: the start tag is rewritten without it rather than widened.
+            start_tag = b'<' + prefix.encode('ascii') + b'row' + _SPANS_ATTR_RE.sub(b'', attrs.rstrip(b'/')) + b'>'
+            cell_splice = None
+            cell_close = f'</{prefix}c>'.encode('ascii')
+            for c in re.compile(rb'<' + p + rb'c\b([^>]*)>').finditer(data, content_start, content_end):
+                r = _ref_attr(c.group(1))
+                if r is None:
+                    return None
+                existing = _range_bounds(r)[0]
+                if existing < col:
+                    continue
+                if existing > col:
+                    cell_splice = (m.start(), c.start(), start_tag + data[content_start:c.start()] + new_cell)
+                    break
+                if c.group(1).endswith(b'/'):
+                    cell_end = c.end()
+                else:
+                    cell_end = data.find(cell_close, c.end())
+                    if cell_end < 0:
+                        return None
+                    cell_end += len(cell_close)
+                inner = data[c.end():cell_end]
+                if (re.search(rb'<' + p + rb'(f|extLst)\b', inner)
+                        or re.search(rb'\s(vm|cm)\s*=', c.group(1))):
+                    return None
+                cell_splice = (c.start(), cell_end, _cell_xml(prefix, c.group(1), value))
+                break
+            if cell_splice is None:
+                # Append at the end of the row
+                cell_splice = (m.start(), row_end, start_tag + data[content_start:content_end] + new_cell + row_close)
+            splice = cell_splice
+            break
+
+    start, end, text = splice
+    data = data[:start] + text + data[end:]
+
+    # Widen the dimension record (it precedes sheetData, so offsets are unaffected)
+    dim = re.search(rb'<' + p + rb'dimension\b[^>]*?ref\s*=\s*["\']([^"\']*)["\']', data)
+    if dim is not None:
+        try:
+            min_col, min_row, max_col, max_row = _range_bounds(dim.group(1).decode('ascii'))
+        except ValueError:
+            min_col = min_row = None
+        if min_col and min_row:
+            max_col, max_row = max_col or min_col, max_row or min_row
+            new_ref = (f'{_col_letters(min(min_col, col))}{min(min_row, row)}:'
+                       f'{_col_letters(max(max_col, col))}{max(max_row, row)}')
+            data = data[:dim.start(1)] + new_ref.encode('ascii') + data[dim.end(1):]
+    return data
+
+def _request_full_calc(data):
+    """Set fullCalcOnLoad in raw workbook.xml so Excel recalculates formulas that
+    depend on the written cell (openpyxl does the same on save).
+    """
+    root = re.search(rb'<(\w+:)?workbook\b', data)
+    prefix = (root.group(1) or b'') if root else b''
+    p = re.escape(prefix)
+    calc = re.search(rb'<' + p + rb'calcPr\b([^>]*?)(/?)>', data)
+    if calc is not None:
+        attrs = re.sub(rb'\sfullCalcOnLoad\s*=\s*("[^"]*"|\'[^\']*\')', b'', calc.group(1))
+        tag = b'<' + prefix + b'calcPr' + attrs + b' fullCalcOnLoad="1"' + calc.group(2) + b'>'
+        return data[:calc.start()] + tag + data[calc.end():]
+    # No calcPr yet: it goes before the first element that follows it in the schema
+    for name in (b'oleSize', b'customWorkbookViews', b'pivotCaches', b'smartTagPr', b'smartTagTypes',
+                 b'webPublishing', b'fileRecoveryPr', b'webPublishObjects', b'extLst', b'/' + prefix + b'workbook'):
+        at = data.find(b'<' + (name if name.startswith(b'/') else prefix + name))
+        if at >= 0:
+            return data[:at] + b'<' + prefix + b'calcPr fullCalcOnLoad="1"/>' + data[at:]
+    return data
+
+def _write_cell_xml(filepath, sheet, cell_ref, value):
+    """Write one cell by patching the worksheet XML inside the .xlsx.
+
+    Only the target sheet and workbook.xml (to request recalculation) are
+    touched; every other zip member is copied over unchanged. Returns False
+    when the file needs the openpyxl fallback.
+    """
+    col, row, _, _ = _range_bounds(cell_ref)
+    # Write through symlinks, as openpyxl's save() does, instead of replacing the link
+    filepath = os.path.realpath(filepath)
+    if col is None or row is None or not zipfile.is_zipfile(filepath):
+        return False
+    if isinstance(value, str) and _XML_ILLEGAL_RE.search(value):
+        return False
+    if isinstance(value, str) and len(value) > 1 and value.startswith('='):
+        return False  # a formula: openpyxl stores it as one rather than as text
+
+    with zipfile.ZipFile(filepath) as zin:
+        try:
+            part = _worksheet_part(zin, sheet)
+            if part is None:
+                return False
+            sheet_xml = _patch_sheet_xml(zin.read(part), col, row, value)
+            if sheet_xml is None:
+                return False
+            patched = {part: sheet_xml, 'xl/workbook.xml': _request_full_calc(zin.read('xl/workbook.xml'))}
+        except (KeyError, ElementTree.ParseError):
+            return False
+
+        fd, tmp_path = tempfile.mkstemp(suffix='.xlsx', dir=os.path.dirname(filepath))
+        try:
+            with os.fdopen(fd, 'wb') as f, zipfile.ZipFile(f, 'w') as zout:
+                for item in zin.infolist():
+                    data = patched.get(item.filename)
+                    zout.writestr(item, data if data is not None else zin.read(item.filename))
+            shutil.copymode(filepath, tmp_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, filepath)
+    return True
+
+def _scan_rows(rows, query):
+    """Yield (offset, row) for each row with a cell containing `query` (lowercase)."""
+    _str = str  # local lookup in the per-cell loop
+    # One lowercase + substring scan per row: cells are joined with a NUL
+    # separator so a match cannot span two cells. Text cells are used as-is;
+    # only other types need str().
+    _join = "\x00".join
+    for offset, row in enumerate(rows):
+        if query in _join([v if type(v) is _str else _str(v) for v in row if v is not None]).lower():
+            yield offset, row
+
+class _SearchIndex:
+    """A sheet's rows plus their lowercased text in one string, so repeated
+    searches in the daemon are a str.find() over the sheet instead of a
+    per-row join and lower().
+
+    Cells are separated by NUL, as in _scan_rows, and each row ends with \\x01,
+    so a match never spans two cells or two rows.
+    """
+
+    def __init__(self, rows):
+        _str, _join = str, "\x00".join
+        self.headers = ["" if v is None else _str(v) for v in next(rows, ())]
+        self.rows = list(rows)
+        starts, parts, pos = [], [], 0
+        for row in self.rows:
+            text = _join([v if type(v) is _str else _str(v) for v in row if v is not None]).lower() + "\x01"
+            starts.append(pos)
+            parts.append(text)
+            pos += len(text)
+        self._starts = starts
+        self._text = "".join(parts)
+
+    def scan(self, query):
+        """Yield (offset, row) for each row matching `query`, like _scan_rows."""
+        if not self._starts:
+            return  # no data rows; find('') would still report a hit at 0
+        if "\x00" in query or "\x01" in query:
+            yield from _scan_rows(self.rows, query)
+            return
+        find, starts, rows = self._text.find, self._starts, self.rows
+        pos = find(query)
+        while pos != -1:
+            offset = bisect_right(starts, pos) - 1
+            yield offset, rows[offset]
+            if offset + 1 == len(starts):
+                return
+            pos = find(query, starts[offset + 1])  # one hit per row
+
+class _WorkbookCache:
+    """LRU of open readers used by the daemon, keyed by path.
+    An entry is reopened when the file's mtime or size changes.
+
+    Requests run on their own threads. A reader is only used while its path's
+    lock (see lock()) is held, so get() and discard() must be called under it;
+    eviction skips readers whose lock another request holds.
+    """
+
+    def __init__(self, max_size):
+        self._max_size = max(1, max_size)
+        self._entries = OrderedDict()  # filepath -> ((mtime_ns, size), reader)
+        self._locks = {}  # filepath -> threading.Lock
+        self._lock = threading.Lock()  # guards _entries and _locks
+
+    def lock(self, filepath):
+        """The lock that serializes requests on one file."""
+        with self._lock:
+            return self._locks.setdefault(filepath, threading.Lock())
+
+    def get(self, filepath):
+        st = os.stat(filepath)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.pop(filepath, None)
+        if entry is not None and entry[0] != stamp:
+            entry[1].close()
+            entry = None
+        if entry is None:
+            # Opened outside the cache lock so requests on other files are not held up
+            reader = _open_reader(filepath)
+            reader.search_indexes = {}  # sheet -> _SearchIndex, built by search on first use
+            entry = (stamp, reader)
+        evicted = []
+        with self._lock:
+            self._entries[filepath] = entry
+            for old_path in list(self._entries):
+                if len(self._entries) - len(evicted) <= self._max_size:
+                    break
+                if old_path != filepath and self._locks[old_path].acquire(blocking=False):
+                    evicted.append((self._locks[old_path], self._entries.pop(old_path)[1]))
+        for old_lock, old in evicted:
+            old.close()
+            old_lock.release()
+        return entry[1]
+
+    def discard(self, filepath):
+        with self._lock:
+            entry = self._entries.pop(filepath, None)
+        if entry is not None:
+            entry[1].close()
+
+    def close(self):
+        for _, reader in self._entries.values():
+            reader.close()
+        self._entries.clear()
+
+def _socket_path(path=None):
+    return os.path.expanduser(path or os.environ.get(_SOCKET_ENV) or _DEFAULT_SOCKET)
+
+def _build_parser():
     parser = argparse.ArgumentParser()
     sub = parser.add_subparsers(dest='command')
 
@@ -26,6 +809,8 @@ def main():
     p_read.add_argument('--range', default=None)
     p_read.add_argument('--max-rows', type=int, default=100,
                         help='Max data rows to return (default 100, use 0 for unlimited)')
+    p_read.add_argument('--ndjson', action='store_true',
+                        help='Stream one JSON object per line instead of a single document')
 
     # read-cell: single cell value
     p_rc = sub.add_parser('read-cell')
@@ -45,6 +830,10 @@ def main():
     p_search.add_argument('filepath')
     p_search.add_argument('query')
     p_search.add_argument('--sheet', default=None)
+    p_search.add_argument('--max-matches', type=int, default=0,
+                          help='Stop after this many matching rows (default 0, unlimited)')
+    p_search.add_argument('--ndjson', action='store_true',
+                          help='Stream one JSON object per line instead of a single document')
 
     # list-sheets
     p_ls = sub.add_parser('list-sheets')
@@ -54,115 +843,476 @@ def main():
     p_info = sub.add_parser('info')
     p_info.add_argument('filepath')
 
+    # daemon: keep workbooks loaded between calls (see _serve)
+    p_daemon = sub.add_parser('daemon')
+    p_daemon.add_argument('--socket', default=None,
+                          help=f'Unix socket path (default ${_SOCKET_ENV} or {_DEFAULT_SOCKET})')
+    p_daemon.add_argument('--max-workbooks', type=int, default=8,
+                          help='Number of workbooks kept open (default 8)')
+
+    return parser
+
+
+def _sheet_summary(wb, name):
+    """info entry for one sheet of an open reader."""
+    max_row, max_col = wb.dimensions(name)
+    # Read first row as headers
+    headers = []
+    for v in next(wb.iter_rows(name, min_row=1, max_row=1), ()):
+        headers.append(str(v) if v is not None else "")
+    return {
+        "name": name,
+        "rows": max_row,
+        "cols": max_col,
+        "headers": headers
+    }
+
+def _sheet_info(filepath, name):
+    """Worker for _parallel_info: summarize one sheet with a reader of its own."""
+    wb = _open_reader(filepath)
+    try:
+        return _sheet_summary(wb, name)
+    finally:
+        wb.close()
+
+def _parallel_info(filepath):
+    """info for a large multi-sheet workbook, one worker process per sheet.
+
+    Used when the fast path cannot answer and the readers would otherwise parse
+    every sheet in turn. Returns None when it is not worth it (one CPU, one
+    sheet, small file), the sheet names cannot be read from the package, or
+    worker processes cannot be started (the caller then uses the serial readers).
+    """
+    workers = os.cpu_count() or 1
+    if workers < 2 or os.path.getsize(filepath) < _PARALLEL_INFO_MIN_BYTES:
+        return None
+    try:
+        with zipfile.ZipFile(filepath) as zf:
+            names = [name for name, _ in _workbook_sheets(zf)[0]]
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        return None
+    if len(names) < 2:
+        return None
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    try:
+        with ProcessPoolExecutor(max_workers=min(len(names), workers)) as pool:
+            # map() returns results in sheet order
+            return list(pool.map(_sheet_info, [filepath] * len(names), names))
+    except (BrokenProcessPool, NotImplementedError, OSError):
+        # e.g. a sandbox without working semaphores, or a worker that was killed
+        return None
+
+def _read_rows(args, wb, prefetch=False):
+    """Start a read. Returns (headers, rows, summarize): `rows` lazily yields one
+    tuple of cell values per data row, in header order, and `summarize(count)`
+    gives the rowCount/totalRows fields once it has been consumed. With
+    `prefetch`, rows are parsed on a background thread (see _RowPrefetcher)
+    until summarize() is called.
+    """
+    min_col = min_row = max_col = max_row = None
+    if args.range:
+        min_col, min_row, max_col, max_row = _range_bounds(args.range)
+    sheet_rows = wb.dimensions(args.sheet)[0]
+    max_rows = args.max_rows
+    # Stop the parser right after the last row we return; the total comes from the sheet dimensions.
+    limit_row = max_row
+    if max_rows > 0 and sheet_rows is not None:
+        stop = (min_row or 1) + max_rows
+        limit_row = min(max_row, stop) if max_row else stop
+    row_iter = wb.iter_rows(args.sheet, min_row, limit_row, min_col, max_col)
+    if prefetch:
+        row_iter = _RowPrefetcher(row_iter)
+    first = next(row_iter, None)
+    if first is None:
+        if prefetch:
+            row_iter.close()
+        return [], iter(()), lambda count: {"rowCount": 0, "totalRows": 0}
+
+    headers = ["" if v is None else str(v) for v in first]
+
+    def rows():
+        # Rows go out as-is: no per-row dict, and values keep their native types
+        # (numbers, booleans, null) for the encoder.
+        count = 0
+        for row in row_iter:
+            yield row
+            count += 1
+            if count == max_rows:
+                break
+
+    def summarize(count):
+        if sheet_rows is None:
+            # No dimension record in the file: count the remaining rows.
+            total = count + sum(1 for _ in row_iter)
+        else:
+            if prefetch:
+                row_iter.close()
+            last_row = min(max_row, sheet_rows) if max_row else sheet_rows
+            total = max(last_row - (min_row or 1), count)
+        result = {"rowCount": count, "totalRows": total}
+        if max_rows > 0 and total > max_rows:
+            result["truncated"] = True
+            result["note"] = f"Showing {max_rows} of {total} rows. Use --max-rows 0 for all, or --range A1:Z{max_rows+1} for a specific range."
+        return result
+
+    return headers, rows(), summarize
+
+def _search_rows(args, wb):
+    """Start a search. Returns (matches, summarize): `matches` lazily yields the
+    match records, and `summarize(count)` gives the matchCount/truncated fields
+    once it has been consumed.
+    """
+    query = args.query.lower()
+    max_matches = args.max_matches
+    truncated = False
+    _str, _EMPTY = str, ""
+    # Readers held by the daemon keep a search index per sheet; others scan the rows once.
+    indexes = getattr(wb, 'search_indexes', None)
+    if indexes is not None:
+        index = indexes.get(args.sheet)
+        if index is None:
+            index = indexes[args.sheet] = _SearchIndex(wb.iter_rows(args.sheet))
+        headers = index.headers
+        found = index.scan(query)
+    else:
+        row_iter = wb.iter_rows(args.sheet)
+        headers = [_EMPTY if v is None else _str(v) for v in next(row_iter, ())]
+        found = _scan_rows(row_iter, query)
+
+    def matches():
+        nonlocal truncated
+        count = 0
+        # The display strings are built for matching rows only.
+        for offset, row in found:
+            if max_matches > 0 and count == max_matches:
+                truncated = True
+                break
+            row_strs = [_EMPTY if v is None else _str(v) for v in row]
+            yield {"row": offset + 2, "data": dict(zip(headers, row_strs))}
+            count += 1
+
+    def summarize(count):
+        result = {"matchCount": count}
+        if truncated:
+            result["truncated"] = True
+        return result
+
+    return matches(), summarize
+
+def _ndjson(header, records, summarize):
+    """NDJSON form of a streamed result: the header, each record, then the summary."""
+    yield header
+    count = 0
+    for record in records:
+        yield record
+        count += 1
+    yield summarize(count)
+
+def _run_command(args, filepath, open_reader, parallel=False):
+    """Run a parsed command and return its JSON result (a dict, or an iterator
+    of records for --ndjson). `open_reader(bounded=False)` returns an open
+    reader for the file (see _open_reader); it is only called by commands that
+    need one. `parallel` allows info to spread large multi-sheet workbooks over
+    worker processes.
+    """
+    if args.command == 'info':
+        sheets = _fast_info(filepath)
+        if sheets is None:
+            sheets = _parallel_info(filepath) if parallel else None
+        if sheets is None:
+            wb = open_reader()
+            sheets = [_sheet_summary(wb, name) for name in wb.sheetnames]
+        return {"file": filepath, "sheets": sheets}
+
+    elif args.command == 'list-sheets':
+        if zipfile.is_zipfile(filepath):
+            try:
+                with zipfile.ZipFile(filepath) as zf:
+                    return {"sheets": [name for name, _ in _workbook_sheets(zf)[0]]}
+            except (KeyError, ElementTree.ParseError):
+                pass
+        return {"sheets": open_reader().sheetnames}
+
+    elif args.command == 'read':
+        # NDJSON is encoded and written as the rows arrive, so parse them ahead on a thread
+        bounded = args.max_rows > 0 or bool(args.range and _range_bounds(args.range)[3])
+        headers, rows, summarize = _read_rows(args, open_reader(bounded=bounded), prefetch=args.ndjson)
+        if args.ndjson:
+            return _ndjson({"headers": headers}, rows, summarize)
+        data = list(rows)
+        return {"headers": headers, "rows": data, **summarize(len(data))}
+
+    elif args.command == 'read-cell':
+        wb = open_reader(bounded=True)
+        col, row, _, _ = _range_bounds(args.cell)
+        if col is None or row is None:
+            raise ValueError(f"Invalid cell: {args.cell}")
+        val = next(wb.iter_rows(args.sheet, row, row, col, col), (None,))
+        val = val[0] if val else None
+        return {"cell": args.cell, "value": str(val) if val is not None else None}
+
+    elif args.command == 'write-cell':
+        val = _parse_cell_value(args.value)
+        if not _write_cell_xml(filepath, args.sheet, args.cell, val):
+            import openpyxl
+            book = openpyxl.load_workbook(filepath)
+            ws = book[args.sheet] if args.sheet else book.active
+            ws[args.cell] = val
+            book.save(filepath)
+            book.close()
+        return {"cell": args.cell, "value": str(val), "saved": True}
+
+    elif args.command == 'search':
+        matches, summarize = _search_rows(args, open_reader())
+        if args.ndjson:
+            return _ndjson({"query": args.query}, matches, summarize)
+        results = list(matches)
+        return {"query": args.query, "matches": results, **summarize(len(results))}
+
+def _cache_file(args, filepath):
+    """Cache entry for this command's output, or None when it is not cacheable.
+
+    The key covers the file's identity and version (real path, inode, mtime,
+    size), every argument that shapes the output and the installed backends,
+    so a changed file or a different --range/--max-rows never hits a stale entry.
+    """
+    if args.command not in ('info', 'list-sheets', 'read') or getattr(args, 'ndjson', False):
+        return None
+    cache_dir = os.environ.get(_CACHE_ENV, _DEFAULT_CACHE)
+    if not cache_dir:
+        return None
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    key = (os.path.realpath(filepath), st.st_ino, st.st_mtime_ns, st.st_size, args.command, args.filepath,
+           getattr(args, 'sheet', None), getattr(args, 'range', None), getattr(args, 'max_rows', None),
+           CalamineWorkbook is not None, orjson is not None, _CACHE_VERSION)
+    digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(os.path.expanduser(cache_dir), digest + '.json')
+
+def _cache_load(path):
+    """Cached output at `path`, or None. A hit refreshes the entry's mtime, which
+    _cache_store evicts by, so the cache is least-recently-used.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            output = f.read()
+    except OSError:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return output
+
+def _cache_store(path, output):
+    """Save an output to the cache, then evict least recently used entries until
+    the directory holds at most _CACHE_MAX_ENTRIES entries and _CACHE_MAX_TOTAL_BYTES.
+    Cache errors are ignored; they never fail the command.
+    """
+    data = output.encode('utf-8')
+    if len(data) > _CACHE_MAX_ENTRY_BYTES:
+        return
+    cache_dir = os.path.dirname(path)
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        entries = []
+        for e in os.scandir(cache_dir):
+            if e.name.endswith('.json'):
+                st = e.stat()
+                entries.append((st.st_mtime_ns, st.st_size, e.path))
+        entries.sort()  # least recently used first
+        count, total = len(entries), sum(size for _, size, _ in entries)
+        for _, size, entry_path in entries:
+            if count <= _CACHE_MAX_ENTRIES and total <= _CACHE_MAX_TOTAL_BYTES:
+                break
+            os.remove(entry_path)
+            count -= 1
+            total -= size
+    except OSError:
+        pass
+
+def _handle_request(parser, workbooks, request):
+    """Run one daemon request ({"argv": [...], "cwd": "..."}). Returns (exit_code, output)."""
+    try:
+        args = parser.parse_args(request["argv"])
+    except SystemExit:
+        return 1, _dumps({"error": f"Invalid arguments: {' '.join(request['argv'])}"})
+    if args.command in (None, 'daemon'):
+        return 1, _dumps({"error": "Expected a file command"})
+    filepath = os.path.join(request.get("cwd", ""), os.path.expanduser(args.filepath))
+    if not os.path.exists(filepath):
+        return 1, _dumps({"error": f"File not found: {filepath}"})
+    with workbooks.lock(filepath):
+        try:
+            if args.command == 'write-cell':
+                workbooks.discard(filepath)
+            # The daemon keeps one reader per file loaded, whichever command opened it
+            result = _run_command(args, filepath, lambda bounded=False: workbooks.get(filepath))
+            if isinstance(result, dict):
+                output = _dumps(result)
+            else:
+                output = "\n".join(_dumps(record) for record in result)
+        except Exception as e:
+            workbooks.discard(filepath)
+            return 1, _dumps({"error": str(e)})
+    return 0, output
+
+def _serve(socket_path, max_workbooks):
+    """Serve commands on a Unix socket, keeping recently used workbooks loaded.
+
+    Protocol: the client sends one JSON line {"argv": [...], "cwd": "..."}; the daemon
+    answers with the exit code on the first line and the command's JSON on the second.
+    Each request runs on its own thread; requests on the same file wait for each other.
+    """
+    import signal, socket, socketserver
+
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)  # stale socket from a daemon that did not shut down cleanly
+        else:
+            print(_dumps({"error": f"Daemon already running on {socket_path}"}))
+            sys.exit(1)
+        finally:
+            probe.close()
+    os.makedirs(os.path.dirname(socket_path) or '.', exist_ok=True)
+
+    parser = _build_parser()
+    workbooks = _WorkbookCache(max_workbooks)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline())
+            except ValueError:
+                code, output = 1, _dumps({"error": "Invalid request"})
+            else:
+                code, output = _handle_request(parser, workbooks, request)
+            self.wfile.write(f"{code}\n{output}\n".encode('utf-8'))
+
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    os.chmod(socket_path, 0o600)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(_dumps({"daemon": socket_path, "pid": os.getpid()}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        workbooks.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+def _daemon_request(argv):
+    """Send a command to a running daemon. Returns (exit_code, output), or None when
+    no daemon is listening so the caller parses the file itself.
+    """
+    socket_path = _socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(1)
+        sock.connect(socket_path)
+        # A busy or hung daemon must not block the caller: past the timeout the
+        # file is parsed here instead.
+        sock.settimeout(_DAEMON_TIMEOUT)
+        sock.sendall((json.dumps({"argv": argv, "cwd": os.getcwd()}) + "\n").encode('utf-8'))
+        with sock.makefile('rb') as f:
+            code = f.readline()
+            output = f.readline()
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    if not code or not output:
+        return None
+    return int(code), output.decode('utf-8').rstrip('\n')
+
+def main():
+    parser = _build_parser()
     args = parser.parse_args()
     if not args.command:
         parser.print_help()
         sys.exit(1)
 
-    try:
-        import openpyxl
-    except ImportError:
-        print(json.dumps({"error": "openpyxl not installed. Run: pip3 install openpyxl"}))
-        sys.exit(1)
+    if args.command == 'daemon':
+        _serve(_socket_path(args.socket), args.max_workbooks)
+        return
+
+    # Same file, same version, same arguments: reuse the previous output.
+    cache_path = _cache_file(args, os.path.expanduser(args.filepath))
+    cached = _cache_load(cache_path) if cache_path else None
+    if cached is not None:
+        print(cached)
+        return
+
+    # A running daemon already has the workbook loaded; otherwise parse it here.
+    # NDJSON output is streamed from this process rather than buffered by the daemon.
+    # write-cell always runs here: if a forwarded write timed out, running it again
+    # locally could race the daemon's copy. The daemon reopens the file when it sees
+    # the new mtime.
+    forward = not getattr(args, 'ndjson', False) and args.command != 'write-cell'
+    response = _daemon_request(sys.argv[1:]) if forward else None
+    if response is not None:
+        code, output = response
+        print(output)
+        if code == 0 and cache_path:
+            _cache_store(cache_path, output)
+        sys.exit(code)
+
+    if CalamineWorkbook is None or args.command == 'write-cell':
+        try:
+            import openpyxl
+        except ImportError:
+            print(_dumps({"error": "openpyxl not installed. Run: pip3 install openpyxl"}))
+            sys.exit(1)
 
     filepath = os.path.expanduser(args.filepath)
     if not os.path.exists(filepath):
-        print(json.dumps({"error": f"File not found: {filepath}"}))
+        print(_dumps({"error": f"File not found: {filepath}"}))
         sys.exit(1)
 
     try:
-        if args.command == 'info':
-            wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
-            sheets = []
-            for name in wb.sheetnames:
-                ws = wb[name]
-                # Read first row as headers
-                headers = []
-                for cell in next(ws.iter_rows(min_row=1, max_row=1, values_only=False), []):
-                    headers.append(str(cell.value) if cell.value is not None else "")
-                sheets.append({
-                    "name": name,
-                    "rows": ws.max_row,
-                    "cols": ws.max_column,
-                    "headers": headers
-                })
-            wb.close()
-            print(json.dumps({"file": filepath, "sheets": sheets}))
-
-        elif args.command == 'list-sheets':
-            wb = openpyxl.load_workbook(filepath, read_only=True)
-            print(json.dumps({"sheets": wb.sheetnames}))
-            wb.close()
-
-        elif args.command == 'read':
-            wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
-            ws = wb[args.sheet] if args.sheet else wb.active
-            rows = []
-            if args.range:
-                for row in ws[args.range]:
-                    rows.append([str(c.value) if c.value is not None else "" for c in row])
-            else:
-                for row in ws.iter_rows(values_only=True):
-                    rows.append([str(v) if v is not None else "" for v in row])
-            wb.close()
-            if rows:
-                headers = rows[0]
-                data_rows = rows[1:]
-                total = len(data_rows)
-                max_rows = args.max_rows
-                truncated = False
-                if max_rows > 0 and total > max_rows:
-                    data_rows = data_rows[:max_rows]
-                    truncated = True
-                data = [dict(zip(headers, r)) for r in data_rows]
-                result = {"headers": headers, "data": data, "rowCount": len(data), "totalRows": total}
-                if truncated:
-                    result["truncated"] = True
-                    result["note"] = f"Showing {max_rows} of {total} rows. Use --max-rows 0 for all, or --range A1:Z{max_rows+1} for a specific range."
-                print(json.dumps(result))
-            else:
-                print(json.dumps({"headers": [], "data": [], "rowCount": 0, "totalRows": 0}))
-
-        elif args.command == 'read-cell':
-            wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
-            ws = wb[args.sheet] if args.sheet else wb.active
-            val = ws[args.cell].value
-            wb.close()
-            print(json.dumps({"cell": args.cell, "value": str(val) if val is not None else None}))
-
-        elif args.command == 'write-cell':
-            wb = openpyxl.load_workbook(filepath)
-            ws = wb[args.sheet] if args.sheet else wb.active
-            # Try to convert to number
-            try:
-                val = float(args.value)
-                if val == int(val):
-                    val = int(val)
-            except ValueError:
-                val = args.value
-            ws[args.cell] = val
-            wb.save(filepath)
-            wb.close()
-            print(json.dumps({"cell": args.cell, "value": str(val), "saved": True}))
-
-        elif args.command == 'search':
-            wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
-            ws = wb[args.sheet] if args.sheet else wb.active
-            query = args.query.lower()
-            results = []
-            headers = None
-            for i, row in enumerate(ws.iter_rows(values_only=True), 1):
-                row_strs = [str(v) if v is not None else "" for v in row]
-                if i == 1:
-                    headers = row_strs
-                    continue
-                if any(query in cell.lower() for cell in row_strs):
-                    results.append({"row": i, "data": dict(zip(headers, row_strs))})
-            wb.close()
-            print(json.dumps({"query": args.query, "matches": results, "matchCount": len(results)}))
+        opened = []
+
+        def open_reader(bounded=False):
+            if not opened:
+                opened.append(_open_reader(filepath, bounded))
+            return opened[0]
 
+        try:
+            result = _run_command(args, filepath, open_reader, parallel=True)
+            if isinstance(result, dict):
+                output = _dumps(result)
+                print(output)
+                if cache_path:
+                    _cache_store(cache_path, output)
+            else:
+                _write_ndjson(result)
+            sys.stdout.flush()
+        finally:
+            for wb in opened:
+                wb.close()
+    except BrokenPipeError:
+        # The reader went away (e.g. `read --ndjson | head`): stop quietly. stdout is
+        # pointed at devnull so the flush at interpreter exit does not fail again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     except Exception as e:
-        print(json.dumps({"error": str(e)}))
+        print(_dumps({"error": str(e)}))
         sys.exit(1)
 
 if __name__ == '__main__':
@@ -13,7 +13,133 @@ Usage:
 
 All output is JSON.
 """
-import sys, json, argparse, os
+import sys, json, argparse, os, re, copy, zipfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# WordprocessingML namespace, in lxml's '{ns}tag' form
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+# Run children that python-docx renders as text (w:br depends on its type)
+_RUN_TEXT = {W + 'tab': '\t', W + 'ptab': '\t', W + 'cr': '\n', W + 'noBreakHyphen': '-'}
+
+# python-docx shows these built-in styles under their UI name instead of the styles.xml name
+_UI_STYLE_NAMES = {'caption': 'Caption', 'footer': 'Footer', 'header': 'Header',
+                   **{f'heading {n}': f'Heading {n}' for n in range(1, 10)}}
+
+# Placeholders like <<Something>> or {{something}}, as reported by info
+_PLACEHOLDER = re.compile(r'<<[^>]+>>|{{[^}]+}}')
+
+def _dumps(obj):
+    """Serialize a result to a JSON string (with orjson when it is installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+def _run_text(r):
+    """Text of a w:r element, matching python-docx's Run.text."""
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W + 't':
+            parts.append(child.text or '')
+        elif tag == W + 'br':
+            if child.get(W + 'type', 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        elif tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[tag])
+    return ''.join(parts)
+
+def _para_text(p):
+    """Text of a w:p element, matching python-docx's Paragraph.text (runs + hyperlinks)."""
+    parts = []
+    for child in p.iterchildren(W + 'r', W + 'hyperlink'):
+        if child.tag == W + 'r':
+            parts.append(_run_text(child))
+        else:
+            parts.extend(_run_text(r) for r in child.iterchildren(W + 'r'))
+    return ''.join(parts)
+
+def _row_cells(tbl):
+    """Yield (w:tr, [w:tc, ...]) for each row of a w:tbl element.
+
+    Cells are laid out the way python-docx's row.cells reports them: a merged
+    cell is repeated once per spanned grid column, and a vertically merged
+    cell resolves to the cell that starts the merge.
+    """
+    above = {}  # grid column -> w:tc covering it in the previous row
+    for tr in tbl.iterchildren(W + 'tr'):
+        cells, grid = [], {}
+        before = tr.find(f'{W}trPr/{W}gridBefore')
+        col = int(before.get(W + 'val', 0)) if before is not None else 0
+        for tc in tr.iterchildren(W + 'tc'):
+            span = tc.find(f'{W}tcPr/{W}gridSpan')
+            span = int(span.get(W + 'val', 1)) if span is not None else 1
+            vmerge = tc.find(f'{W}tcPr/{W}vMerge')
+            if vmerge is not None and vmerge.get(W + 'val', 'continue') == 'continue' and col in above:
+                tc = above[col]
+            cells.extend([tc] * span)
+            grid[col] = tc
+            col += span
+        above = grid
+        yield tr, cells
+
+def _table_rows(tbl):
+    """Cell texts of a w:tbl element, row by row (see _row_cells for merged cells)."""
+    rows = []
+    texts = {}
+    for _, cells in _row_cells(tbl):
+        row = []
+        for tc in cells:
+            if tc not in texts:
+                texts[tc] = '\n'.join(_para_text(p) for p in tc.iterchildren(W + 'p'))
+            row.append(texts[tc])
+        rows.append(row)
+    return rows
+
+def _iter_body(zf):
+    """Stream the top-level w:p and w:tbl elements of word/document.xml.
+
+    Parses with lxml iterparse instead of building python-docx's object model.
+    Each element is freed once the caller moves on, so memory stays bounded
+    by the largest paragraph or table.
+    """
+    from lxml import etree
+    with zf.open('word/document.xml') as f:
+        for _, el in etree.iterparse(f, tag=(W + 'p', W + 'tbl')):
+            parent = el.getparent()
+            if parent is None or parent.tag != W + 'body':
+                continue  # inside a table cell; read together with its table
+            yield el
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
+
+def _paragraph_style_names(zf):
+    """Map paragraph style ids to names from word/styles.xml.
+    Returns (names_by_id, default_name).
+    """
+    from lxml import etree
+    try:
+        with zf.open('word/styles.xml') as f:
+            root = etree.parse(f).getroot()
+    except KeyError:
+        return {}, None
+    names, default = {}, None
+    for style in root.iterchildren(W + 'style'):
+        if style.get(W + 'type') != 'paragraph':
+            continue
+        name_el = style.find(W + 'name')
+        name = name_el.get(W + 'val') if name_el is not None else None
+        name = _UI_STYLE_NAMES.get(name, name)
+        names[style.get(W + 'styleId')] = name
+        if style.get(W + 'default') in ('1', 'true', 'on') and default is None:
+            default = name
+    return names, default
 
 def _replace_in_paragraph(paragraph, placeholder, value):
     """Replace placeholder in a paragraph, handling text split across multiple XML runs.
@@ -29,8 +155,9 @@ def _replace_in_paragraph(paragraph, placeholder, value):
     count = full_text.count(placeholder)
 
     # Try simple per-run replacement first (works when placeholder is in a single run)
+    runs = paragraph.runs
     simple_count = 0
-    for run in paragraph.runs:
+    for run in runs:
         if placeholder in run.text:
             run.text = run.text.replace(placeholder, value)
             simple_count += run.text.count(value)
@@ -42,7 +169,6 @@ def _replace_in_paragraph(paragraph, placeholder, value):
     # Strategy: merge all run text, do replacement, put result in first run, clear others
     # Preserve formatting of the first run.
     new_text = full_text.replace(placeholder, value)
-    runs = paragraph.runs
     if runs:
         runs[0].text = new_text
         for run in runs[1:]:
@@ -50,21 +176,165 @@ def _replace_in_paragraph(paragraph, placeholder, value):
 
     return count
 
+def _doc_paragraphs(doc, needle=None):
+    """All w:p elements of the document body, in document order, including those in
+    (nested) table cells and content controls. replace and replace-batch both fill
+    this same set of paragraphs.
+
+    With `needle`, libxml2 only returns the paragraphs whose text contains it, so
+    the rest are never walked run by run.
+    """
+    from lxml import etree
+
+    if needle is None:
+        return etree.XPath('.//w:p', namespaces={'w': W[1:-1]})(doc.element.body)
+    find = etree.XPath('.//w:p[contains(string(.), $needle)]', namespaces={'w': W[1:-1]})
+    return find(doc.element.body, needle=needle)
+
 def _replace_in_doc(doc, placeholder, value):
     """Replace placeholder throughout entire document (paragraphs + table cells).
     Handles placeholders split across XML runs.
     Returns total replacement count.
     """
+    from docx.text.paragraph import Paragraph
+
     count = 0
-    for para in doc.paragraphs:
-        count += _replace_in_paragraph(para, placeholder, value)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for para in cell.paragraphs:
-                    count += _replace_in_paragraph(para, placeholder, value)
+    for p in _doc_paragraphs(doc, needle=placeholder):
+        count += _replace_in_paragraph(Paragraph(p, doc._body), placeholder, value)
     return count
 
+def _replace_batch_in_paragraph(p, pattern, replacements, counts):
+    """Replace every placeholder matched by `pattern` in a w:p element in a single pass.
+
+    Like _replace_in_paragraph, placeholders split across runs are handled by
+    merging the paragraph text into the first run. Match counts are added to `counts`.
+    Run text is read and written on the XML directly rather than through python-docx's Run.
+    """
+    full_text = _para_text(p)
+    matches = pattern.findall(full_text)
+    if not matches:
+        return
+    for key in matches:
+        counts[key] += 1
+
+    sub_fn = lambda m: replacements[m.group(0)]
+    runs = list(p.iterchildren(W + 'r'))  # the runs python-docx's paragraph.runs covers
+    simple_count = 0
+    for r in runs:
+        text = _run_text(r)
+        if pattern.search(text):
+            text, n = pattern.subn(sub_fn, text)
+            _set_run_text(r, text)
+            simple_count += n
+
+    if simple_count < len(matches):
+        # At least one placeholder is split across runs — rebuild from the original text
+        if runs:
+            _set_run_text(runs[0], pattern.sub(sub_fn, full_text))
+            for r in runs[1:]:
+                _set_run_text(r, '')
+
+def _replace_batch_in_doc(doc, replacements):
+    """Replace all placeholders in one walk over the document (paragraphs + table cells).
+    Returns a dict of replacement counts per placeholder.
+    """
+    counts = dict.fromkeys(replacements, 0)
+    if not replacements:
+        return counts
+    # Longest keys first so a placeholder that is a prefix of another never wins
+    keys = sorted(replacements, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(k) for k in keys))
+    values = {k: str(v) for k, v in replacements.items()}
+    for p in _doc_paragraphs(doc):
+        _replace_batch_in_paragraph(p, pattern, values, counts)
+    return counts
+
+def _sub(parent, tag):
+    """Append a new child element (created by the parent's parser) and return it."""
+    el = parent.makeelement(tag, {})
+    parent.append(el)
+    return el
+
+def _set_cell_text(tc, text):
+    """Set the text of a w:tc element in place.
+
+    The cell keeps its first paragraph and run (and with them the paragraph and
+    character formatting); everything else is dropped, as with python-docx's
+    cell.text setter. Tabs and line breaks become w:tab / w:br like run.text does.
+    """
+    p = tc.find(W + 'p')
+    for child in list(tc):
+        if child is not p and child.tag != W + 'tcPr':
+            tc.remove(child)
+    if p is None:
+        p = _sub(tc, W + 'p')
+    r = p.find(W + 'r')
+    for child in list(p):
+        if child is not r and child.tag != W + 'pPr':
+            p.remove(child)
+    if r is None:
+        r = _sub(p, W + 'r')
+    _set_run_text(r, text)
+
+def _set_run_text(r, text):
+    """Set the text of a w:r element in place, keeping its w:rPr, like python-docx's run.text.
+
+    A run holding a single w:t just has that element's text swapped; otherwise the
+    content is rebuilt, with tabs and line breaks as w:tab / w:br.
+    """
+    content = [child for child in r if child.tag != W + 'rPr']
+    if (len(content) == 1 and content[0].tag == W + 't' and text
+            and '\t' not in text and '\n' not in text and '\r' not in text):
+        t = content[0]
+        t.text = text
+        if text != text.strip():
+            t.set(XML_SPACE, 'preserve')
+        return
+    for child in content:
+        r.remove(child)
+    for piece in re.split(r'([\t\n\r])', text):
+        if piece == '\t':
+            _sub(r, W + 'tab')
+        elif piece in ('\n', '\r'):
+            _sub(r, W + 'br')
+        elif piece:
+            t = _sub(r, W + 't')
+            t.text = piece
+            if piece != piece.strip():
+                t.set(XML_SPACE, 'preserve')
+
+def _blank_row(tbl):
+    """An empty w:tr with one cell per grid column, as python-docx's table.add_row() builds it."""
+    tr = tbl.makeelement(W + 'tr', {})
+    for grid_col in tbl.iterfind(f'{W}tblGrid/{W}gridCol'):
+        tc = _sub(tr, W + 'tc')
+        width = grid_col.get(W + 'w')
+        if width is not None:
+            tc_w = _sub(_sub(tc, W + 'tcPr'), W + 'tcW')
+            tc_w.set(W + 'w', width)
+            tc_w.set(W + 'type', 'dxa')
+        _sub(tc, W + 'p')
+    return tr
+
+def _fill_table(tbl, data):
+    """Write rows of values into a w:tbl element, skipping the header row.
+    Rows are appended (copies of a blank template row) when the table runs out.
+    """
+    rows = [cells for _, cells in _row_cells(tbl)]
+    template = None
+    for i, row_data in enumerate(data):
+        row_idx = i + 1  # skip header
+        if row_idx < len(rows):
+            cells = rows[row_idx]
+        else:
+            if template is None:
+                template = _blank_row(tbl)
+            tr = copy.deepcopy(template)
+            tbl.append(tr)
+            cells = list(tr.iterchildren(W + 'tc'))
+        for tc, val in zip(cells, row_data):
+            _set_cell_text(tc, str(val))
+
 def main():
     parser = argparse.ArgumentParser()
     sub = parser.add_subparsers(dest='command')
@@ -106,90 +376,97 @@ def main():
         parser.print_help()
         sys.exit(1)
 
+    # Read-only commands parse the XML directly and only need lxml
+    read_only = args.command in ('info', 'read', 'read-tables')
     try:
-        from docx import Document
-    except ImportError:
-        print(json.dumps({"error": "python-docx not installed. Run: pip3 install python-docx"}))
+        if read_only:
+            import lxml.etree
+        else:
+            from docx import Document
+    except ImportError as e:
+        # Name the package that is actually missing (python-docx itself needs lxml)
+        package = 'lxml' if (e.name or '').split('.')[0] == 'lxml' else 'python-docx'
+        print(_dumps({"error": f"{package} not installed. Run: pip3 install {package}"}))
         sys.exit(1)
 
-    import re
-
     filepath = os.path.expanduser(args.filepath)
     if not os.path.exists(filepath):
-        print(json.dumps({"error": f"File not found: {filepath}"}))
+        print(_dumps({"error": f"File not found: {filepath}"}))
         sys.exit(1)
 
     try:
         if args.command == 'info':
-            doc = Document(filepath)
-            full_text = "\n".join(p.text for p in doc.paragraphs)
-            # Find placeholders like <<Something>> or {{something}}
-            placeholders = list(set(re.findall(r'<<[^>]+>>|{{[^}]+}}', full_text)))
+            paragraph_count = 0
+            placeholders = {}  # insertion-ordered set
             tables_info = []
-            for i, table in enumerate(doc.tables):
-                headers = [cell.text.strip() for cell in table.rows[0].cells] if table.rows else []
-                tables_info.append({"index": i, "rows": len(table.rows), "cols": len(table.columns), "headers": headers})
-            print(json.dumps({
+            with zipfile.ZipFile(filepath) as zf:
+                for el in _iter_body(zf):
+                    if el.tag == W + 'p':
+                        # Match each paragraph as it streams past instead of joining the whole document
+                        paragraph_count += 1
+                        placeholders.update(dict.fromkeys(_PLACEHOLDER.findall(_para_text(el))))
+                        continue
+                    rows = _table_rows(el)
+                    headers = [text.strip() for text in rows[0]] if rows else []
+                    cols = len(el.findall(f'{W}tblGrid/{W}gridCol'))
+                    tables_info.append({"index": len(tables_info), "rows": len(rows), "cols": cols, "headers": headers})
+            print(_dumps({
                 "file": filepath,
-                "paragraphs": len(doc.paragraphs),
+                "paragraphs": paragraph_count,
                 "tables": tables_info,
-                "placeholders": placeholders
+                "placeholders": list(placeholders)
             }))
 
         elif args.command == 'read':
-            doc = Document(filepath)
-            paragraphs = [{"index": i, "text": p.text, "style": p.style.name} for i, p in enumerate(doc.paragraphs) if p.text.strip()]
-            print(json.dumps({"paragraphs": paragraphs}))
+            paragraphs = []
+            with zipfile.ZipFile(filepath) as zf:
+                style_names, default_style = _paragraph_style_names(zf)
+                i = 0
+                for el in _iter_body(zf):
+                    if el.tag != W + 'p':
+                        continue
+                    text = _para_text(el)
+                    if text.strip():
+                        style_id = el.find(f'{W}pPr/{W}pStyle')
+                        style_id = style_id.get(W + 'val') if style_id is not None else None
+                        paragraphs.append({"index": i, "text": text, "style": style_names.get(style_id, default_style)})
+                    i += 1
+            print(_dumps({"paragraphs": paragraphs}))
 
         elif args.command == 'read-tables':
-            doc = Document(filepath)
             tables = []
-            for i, table in enumerate(doc.tables):
-                rows = []
-                for row in table.rows:
-                    rows.append([cell.text.strip() for cell in row.cells])
-                tables.append({"index": i, "rows": rows})
-            print(json.dumps({"tables": tables}))
+            with zipfile.ZipFile(filepath) as zf:
+                for el in _iter_body(zf):
+                    if el.tag == W + 'tbl':
+                        rows = [[text.strip() for text in row] for row in _table_rows(el)]
+                        tables.append({"index": len(tables), "rows": rows})
+            print(_dumps({"tables": tables}))
 
         elif args.command == 'replace':
             doc = Document(filepath)
             count = _replace_in_doc(doc, args.placeholder, args.value)
             output = args.output or filepath
             doc.save(os.path.expanduser(output))
-            print(json.dumps({"replaced": args.placeholder, "with": args.value, "count": count, "saved": output}))
+            print(_dumps({"replaced": args.placeholder, "with": args.value, "count": count, "saved": output}))
 
         elif args.command == 'replace-batch':
             doc = Document(filepath)
             replacements = json.loads(args.replacements)
-            counts = {}
-            for key, value in replacements.items():
-                counts[key] = _replace_in_doc(doc, key, str(value))
+            counts = _replace_batch_in_doc(doc, replacements)
             output = args.output or filepath
             doc.save(os.path.expanduser(output))
-            print(json.dumps({"replacements": counts, "saved": output}))
+            print(_dumps({"replacements": counts, "saved": output}))
 
         elif args.command == 'fill-table':
             doc = Document(filepath)
             data = json.loads(args.data)
-            table = doc.tables[args.table_index]
-            for i, row_data in enumerate(data):
-                row_idx = i + 1  # skip header
-                if row_idx < len(table.rows):
-                    for j, val in enumerate(row_data):
-                        if j < len(table.rows[row_idx].cells):
-                            table.rows[row_idx].cells[j].text = str(val)
-                else:
-                    # Add new row
-                    new_row = table.add_row()
-                    for j, val in enumerate(row_data):
-                        if j < len(new_row.cells):
-                            new_row.cells[j].text = str(val)
+            _fill_table(doc.tables[args.table_index]._tbl, data)
             output = args.output or filepath
             doc.save(os.path.expanduser(output))
-            print(json.dumps({"table_index": args.table_index, "rows_filled": len(data), "saved": output}))
+            print(_dumps({"table_index": args.table_index, "rows_filled": len(data), "saved": output}))
 
     except Exception as e:
-        print(json.dumps({"error": str(e)}))
+        print(_dumps({"error": str(e)}))
         sys.exit(1)
 
 if __name__ == '__main__':
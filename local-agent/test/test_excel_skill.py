@@ -0,0 +1,85 @@
+"""Checks for excel-skill.py internals. Run: python3 -m unittest discover local-agent/test"""
+import importlib.util
+import os
+import unittest
+
+_SKILL = os.path.join(os.path.dirname(__file__), '..', 'src', 'skills', 'excel-skill.py')
+_spec = importlib.util.spec_from_file_location('excel_skill', _SKILL)
+skill = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(skill)
+
+
+class SearchIndexTest(unittest.TestCase):
+    SHEETS = {
+        'empty': [],
+        'header only': [('Name', 'Age')],
+        'data': [('Name', 'Age'), ('Alice', 30), (None, None), ('bob', 4.5), ('ÄPFEL', True), ('a\x00b', 'x y')],
+    }
+    QUERIES = ['', 'a', 'alice', '30', '4.5', 'true', 'äpfel', 'x y', 'a\x00b', 'zzz']
+
+    def test_scan_matches_scan_rows(self):
+        for sheet, rows in self.SHEETS.items():
+            for query in self.QUERIES:
+                with self.subTest(sheet=sheet, query=query):
+                    index = skill._SearchIndex(iter(rows))
+                    expected = list(skill._scan_rows(iter(rows[1:]), query))
+                    self.assertEqual(list(index.scan(query)), expected)
+
+
+class PatchSheetXmlTest(unittest.TestCase):
+    HEAD = b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+
+    def patch(self, body, ref, value, head=HEAD, tail=b'</worksheet>'):
+        col, row, _, _ = skill._range_bounds(ref)
+        out = skill._patch_sheet_xml(head + body + tail, col, row, value)
+        return out[len(head):-len(tail)] if out is not None else None
+
+    def test_insert_before_existing_cells_drops_spans(self):
+        body = b'<dimension ref="B2:C2"/><sheetData><row r="2" spans="2:3"><c r="B2"><v>1</v></c></row></sheetData>'
+        self.assertEqual(
+            self.patch(body, 'A2', 5),
+            b'<dimension ref="A2:C2"/><sheetData><row r="2"><c r="A2"><v>5</v></c><c r="B2"><v>1</v></c></row></sheetData>')
+
+    def test_insert_after_existing_cells_drops_spans(self):
+        body = b'<sheetData><row r="2" spans="1:1" ht="20"><c r="A2"><v>1</v></c></row></sheetData>'
+        self.assertEqual(
+            self.patch(body, 'C2', 'x'),
+            b'<sheetData><row r="2" ht="20"><c r="A2"><v>1</v></c>'
+            b'<c r="C2" t="inlineStr"><is><t>x</t></is></c></row></sheetData>')
+
+    def test_replace_existing_cell_keeps_style_and_spans(self):
+        body = b'<sheetData><row r="1" spans="1:2"><c r="A1" s="3" t="s"><v>0</v></c><c r="B1"><v>2</v></c></row></sheetData>'
+        self.assertEqual(
+            self.patch(body, 'A1', 7.5),
+            b'<sheetData><row r="1" spans="1:2"><c r="A1" s="3"><v>7.5</v></c><c r="B1"><v>2</v></c></row></sheetData>')
+
+    def test_new_row_between_and_after_rows(self):
+        body = b'<sheetData><row r="1"><c r="A1"><v>1</v></c></row><row r="3"><c r="A3"><v>3</v></c></row></sheetData>'
+        self.assertEqual(
+            self.patch(body, 'B2', 2),
+            b'<sheetData><row r="1"><c r="A1"><v>1</v></c></row><row r="2"><c r="B2"><v>2</v></c></row>'
+            b'<row r="3"><c r="A3"><v>3</v></c></row></sheetData>')
+        self.assertEqual(
+            self.patch(body, 'A4', 4),
+            b'<sheetData><row r="1"><c r="A1"><v>1</v></c></row><row r="3"><c r="A3"><v>3</v></c></row>'
+            b'<row r="4"><c r="A4"><v>4</v></c></row></sheetData>')
+
+    def test_empty_sheet_data(self):
+        self.assertEqual(self.patch(b'<sheetData/>', 'B1', 1),
+                         b'<sheetData><row r="1"><c r="B1"><v>1</v></c></row></sheetData>')
+
+    def test_prefixed_namespace(self):
+        head = b'<x:worksheet xmlns:x="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        body = b'<x:sheetData><x:row r="1" spans="2:2"><x:c r="B1"><x:v>1</x:v></x:c></x:row></x:sheetData>'
+        self.assertEqual(
+            self.patch(body, 'A1', ' a', head=head, tail=b'</x:worksheet>'),
+            b'<x:sheetData><x:row r="1"><x:c r="A1" t="inlineStr"><x:is><x:t xml:space="preserve"> a</x:t></x:is></x:c>'
+            b'<x:c r="B1"><x:v>1</x:v></x:c></x:row></x:sheetData>')
+
+    def test_formula_cell_is_left_to_openpyxl(self):
+        body = b'<sheetData><row r="1"><c r="A1"><f>B1*2</f><v>4</v></c></row></sheetData>'
+        self.assertIsNone(self.patch(body, 'A1', 1))
+
+
+if __name__ == '__main__':
+    unittest.main()